@@ -1,18 +1,49 @@
-from flask import Flask, render_template, jsonify, request
-import requests, random, re, html
+from flask import Flask, render_template, jsonify, request, g
+import requests, random, re, html, heapq, itertools
 from collections import deque
-import os, json, sys, time, threading, webbrowser
+import os, json, sys, time, threading, webbrowser, sqlite3, queue
+import argparse, multiprocessing, shutil, subprocess, atexit, cProfile, pstats
+import hashlib, inspect
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 ANKI_CONNECT_URL = "http://127.0.0.1:8765"
 SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
 BUNDLE_DIR = getattr(sys, "_MEIPASS", SOURCE_DIR)
 RUNTIME_DIR = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else SOURCE_DIR
 SETTINGS_FILE = os.path.join(RUNTIME_DIR, "settings.json")
+ANSWER_LOG_FILE = os.path.join(RUNTIME_DIR, "answer_log.sqlite3")
+PARSE_CACHE_FILE = os.path.join(RUNTIME_DIR, "parse_cache.json")
+PROFILE_DIR = os.path.join(RUNTIME_DIR, "profiles")
+BACKENDS_FILE = os.path.join(RUNTIME_DIR, "backends.json")
 TEMPLATE_DIR = os.path.join(BUNDLE_DIR, "templates")
 STATIC_DIR = os.path.join(BUNDLE_DIR, "static")
+GRADING_VECTORS_FILE = os.path.join(STATIC_DIR, "grading_vectors.json")
 DECK_NAME = "Japanese Review"
 REINSERT_MIN_INDEX = 4
+REVIEW_WINDOW_SIZE = 20   # cards materialized into the review queue at once
+ANSWER_LOG_BATCH = 256    # max events written per answer-log transaction
+RESPONSE_BUCKET_MS = 50   # response-time histogram resolution
+RESPONSE_MAX_MS = 60000   # slower answers are clamped into the last bucket
+LINT_BATCH_SIZE = 500     # notes per notesInfo call / worker task
+CARD_STATS_BATCH_SIZE = 500  # cards per cardsInfo call when ranking a backlog
+PROFILE_MODES = {"sample", "cprofile"}
+PROFILE_ROUTES = {"/next", "/answer", "/undo"}
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_DUMP_EVERY = 50   # profiled requests between dumps (also dumped at exit)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5000
+DEFAULT_BACKEND = {
+    "name": "default",
+    "url": ANKI_CONNECT_URL,
+    "port": DEFAULT_PORT,
+    "maxConcurrent": 4,   # simultaneous AnkiConnect requests (and pooled connections)
+    "timeout": 10,        # seconds per request, and to wait for a free slot
+}
+BACKEND_RETRY_AFTER = 5   # seconds an unreachable backend fails fast before being retried
+BACKEND_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
 DEFAULT_MODE = "reviews"
+DEFAULT_ORDER = "random"
 DEFAULT_UI_SETTINGS = {
     "colors": {
         "purple": "#9f00ee",
@@ -47,6 +78,12 @@ LESSON_PHASE = None       # None | "study" | "quiz"
 LESSON_REMAINING_IDS = []
 LESSON_CHUNK_IDS = []
 LESSON_STUDY_CARDS = []
+REVIEW_PENDING_IDS = []   # shuffled review cardIds for this session
+REVIEW_PENDING_POS = 0    # next index in REVIEW_PENDING_IDS to pull into the window
+REVIEW_SESSION_CAP = 0    # 0 = no cap on reviews per session
+SESSION_ORDER = DEFAULT_ORDER  # key of ORDER_STRATEGIES used for reviews
+CARD_CACHE = {}           # cardId -> card_payload() dict for cards in the review window
+CARD_STATS = {}           # cardId -> scheduling fields from cardsInfo
 UI_SETTINGS = {}
 
 HEX_COLOR_RE = re.compile(r"^#[0-9a-fA-F]{6}$")
@@ -116,16 +153,154 @@ def template_base_context():
 apply_loaded_settings()
 
 
+# ---- anki backends ----
+# Each backend is served by its own process (see serve_backends), so review
+# state, connection pool, concurrency limit and health never cross backends.
+BACKEND = {}              # backend this process is bound to
+BACKEND_HEALTH = {"ok": True, "checked": 0.0, "error": ""}
+_anki_http = None         # requests.Session pooled for BACKEND
+_anki_slots = None        # BoundedSemaphore(BACKEND["maxConcurrent"])
+
+def normalize_backends(raw: dict | None):
+    """
+    Return (host, backends) from backends.json data, falling back to the defaults.
+    Entries that can't be used are skipped with the reason printed, never silently.
+    """
+    label = os.path.basename(BACKENDS_FILE)
+    if raw is not None and not isinstance(raw, dict):
+        print(f"{label}: expected a JSON object, using the default backend")
+    raw = raw if isinstance(raw, dict) else {}
+    host = raw.get("host")
+    if host is not None and not (isinstance(host, str) and host.strip()):
+        print(f"{label}: ignoring host {host!r}, using {DEFAULT_HOST}")
+    host = host.strip() if isinstance(host, str) and host.strip() else DEFAULT_HOST
+
+    backends = []
+    names, ports = {}, {}
+    entries = raw.get("backends", [])
+    if not isinstance(entries, list):
+        print(f"{label}: \"backends\" must be a list, using the default backend")
+        entries = []
+    for i, entry in enumerate(entries):
+        problem = backend_entry_problem(entry, i, names, ports)
+        if problem:
+            print(f"{label}: skipping backends[{i}]: {problem}")
+            continue
+        backend = dict(DEFAULT_BACKEND)
+        backend.update({k: entry[k] for k in ("port", "maxConcurrent", "timeout") if k in entry})
+        backend["port"] = int(entry.get("port", DEFAULT_PORT + i))
+        backend["maxConcurrent"] = int(backend["maxConcurrent"])
+        backend["timeout"] = float(backend["timeout"])
+        backend["name"] = entry["name"]
+        backend["url"] = entry["url"].rstrip("/")
+        names[backend["name"]] = i
+        ports[backend["port"]] = backend["name"]
+        backends.append(backend)
+
+    if entries and not backends:
+        print(f"{label}: no usable backends, using the default ({ANKI_CONNECT_URL} on port {DEFAULT_PORT})")
+    return host, backends or [dict(DEFAULT_BACKEND)]
+
+def backend_entry_problem(entry, index: int, names: dict, ports: dict):
+    """Why a backends.json entry can't be used, or None if it can."""
+    if not isinstance(entry, dict):
+        return f"expected an object, got {entry!r}"
+    name, url = entry.get("name"), entry.get("url")
+    if name is None or url is None:
+        return f"missing {'name' if name is None else 'url'}"
+    if not isinstance(name, str) or not BACKEND_NAME_RE.match(name):
+        return f"name {name!r} must be 1-40 letters, digits, _ or -"
+    if name in names:
+        return f"name {name!r} is already used by backends[{names[name]}]"
+    if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+        return f"url {url!r} must start with http:// or https://"
+    for key in ("port", "maxConcurrent", "timeout"):
+        if key not in entry:
+            continue
+        value = entry[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return f"{key} must be a positive number, got {value!r}"
+        if key != "timeout" and value != int(value):
+            return f"{key} must be a whole number, got {value!r}"
+    port = int(entry.get("port", DEFAULT_PORT + index))
+    if port > 65535:
+        return f"port {port} is out of range"
+    if port in ports:
+        return f"port {port} is already used by {ports[port]!r}"
+    return None
+
+def load_backends():
+    """Read backends.json; a file that exists but can't be read stops the app."""
+    if not os.path.exists(BACKENDS_FILE):
+        return normalize_backends(None)
+    try:
+        with open(BACKENDS_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Could not read {BACKENDS_FILE}: {e}")
+    return normalize_backends(raw)
+
+def select_backend(backend: dict):
+    """Bind this process to one AnkiConnect backend."""
+    global BACKEND, _anki_http, _anki_slots, ANSWER_LOG_FILE, PROFILE_DIR
+    BACKEND = dict(backend)
+    _anki_http = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=BACKEND["maxConcurrent"])
+    _anki_http.mount("http://", adapter)
+    _anki_http.mount("https://", adapter)
+    _anki_slots = threading.BoundedSemaphore(BACKEND["maxConcurrent"])
+    BACKEND_HEALTH.update(ok=True, checked=0.0, error="")
+    if BACKEND["name"] != DEFAULT_BACKEND["name"]:
+        ANSWER_LOG_FILE = os.path.join(RUNTIME_DIR, f"answer_log-{BACKEND['name']}.sqlite3")
+        PROFILE_DIR = os.path.join(RUNTIME_DIR, "profiles", BACKEND["name"])
+
+def find_backend(backends: list[dict], name: str | None):
+    for backend in backends:
+        if backend["name"] == name:
+            return backend
+    raise SystemExit(f"Unknown backend {name!r}; configured: {', '.join(b['name'] for b in backends)}")
+
+def is_main_process() -> bool:
+    """
+    False in multiprocessing children, which re-import this module under spawn.
+    (parent_process() is only set after that import; the child's name is set before.)
+    """
+    return multiprocessing.current_process().name == "MainProcess"
+
+# main() reads backends.json and rebinds; children are handed their backend.
+select_backend(DEFAULT_BACKEND)
+
+
 # ---- anki helpers ----
 def anki_request(action, params=None):
+    name = BACKEND["name"]
+    if not BACKEND_HEALTH["ok"] and time.time() - BACKEND_HEALTH["checked"] < BACKEND_RETRY_AFTER:
+        raise RuntimeError(f"AnkiConnect backend {name} unreachable: {BACKEND_HEALTH['error']}")
+    if not _anki_slots.acquire(timeout=BACKEND["timeout"]):
+        raise RuntimeError(f"AnkiConnect backend {name} is busy")
     payload = {"action": action, "version": 6, "params": params or {}}
-    r = requests.post(ANKI_CONNECT_URL, json=payload, timeout=10)
-    r.raise_for_status()
-    data = r.json()
+    try:
+        r = _anki_http.post(BACKEND["url"], json=payload, timeout=BACKEND["timeout"])
+        r.raise_for_status()
+        data = r.json()
+    except requests.RequestException as e:
+        BACKEND_HEALTH.update(ok=False, checked=time.time(), error=str(e))
+        raise
+    finally:
+        _anki_slots.release()
+    BACKEND_HEALTH.update(ok=True, checked=time.time(), error="")
     if data.get("error"):
         raise RuntimeError(data["error"])
     return data["result"]
 
+def backend_health():
+    """Probe the bound backend with the cheap version action."""
+    try:
+        version = anki_request("version")
+        return {"ok": True, "version": version}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
 def anki_undo_safe():
     try:
         return anki_request("undo")
@@ -266,7 +441,7 @@ def extract_meanings(notes_text: str):
 
 def normalize_meaning(s: str) -> str:
     s = (s or "").strip().lower()
-    s = html.unescape(s).replace("’", "'")
+    s = s.replace("’", "'")
     s = s.replace("'", "")
     s = s.replace("(", " ").replace(")", " ")
     s = re.sub(r"[^a-z0-9\s]", " ", s)
@@ -316,15 +491,16 @@ def katakana_to_hiragana(s: str) -> str:
     return "".join(out)
 
 def normalize_reading(s: str) -> str:
-    s = html.unescape((s or "").strip())
+    s = (s or "").strip()
     s = katakana_to_hiragana(s)
     s = s.lower()
     s = re.sub(r"[\s\u3000\u30fb\u3001\u3002\.,!?'\-]", "", s)
     return s
 
 def reading_match(user: str, expected: str) -> bool:
+    # expected comes from the Back field and may hold entities; user input is plain text
     u = normalize_reading(user)
-    e = normalize_reading(expected)
+    e = normalize_reading(html.unescape(expected or ""))
     if not u or not e:
         return False
     if u == e:
@@ -339,24 +515,354 @@ def reading_match(user: str, expected: str) -> bool:
     return e in variants
 
 
+# ---- parse cache ----
+# Keyed by raw field text, so entries never go stale when a note is edited,
+# and stamped with parser_version() so they do when the parsers change.
+READING_CACHE = {}        # Back text -> [reading kana, reading display]
+MEANING_CACHE = {}        # Notes text -> meanings list
+
+def parsed_reading(back: str):
+    cached = READING_CACHE.get(back)
+    if cached is None:
+        cached = [extract_reading_kana(back), reading_display(back)]
+        READING_CACHE[back] = cached
+    return cached
+
+def parsed_meanings(notes: str):
+    cached = MEANING_CACHE.get(notes)
+    if cached is None:
+        cached = extract_meanings(notes)
+        MEANING_CACHE[notes] = cached
+    return list(cached)
+
+def parser_version() -> str:
+    """Hash of the field parsers (source, or bytecode in a frozen build) and their regexes."""
+    h = hashlib.sha1()
+    for fn in (extract_reading_kana, reading_display, extract_meanings):
+        try:
+            h.update(inspect.getsource(fn).encode("utf-8"))
+        except (OSError, TypeError):
+            h.update(fn.__code__.co_code)
+    for rx in (BRACKET_RE, KANJI_FURIGANA_RE, KANJI_RE, _BR_RE, _TAG_RE):
+        h.update(rx.pattern.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+PARSER_VERSION = parser_version()
+
+def load_parse_cache():
+    if not os.path.exists(PARSE_CACHE_FILE):
+        return
+    try:
+        with open(PARSE_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("parser") != PARSER_VERSION:
+            return  # written by different parsing code; rerun lint to rebuild
+        READING_CACHE.update(data.get("readings", {}))
+        MEANING_CACHE.update(data.get("meanings", {}))
+    except Exception:
+        pass
+
+def save_parse_cache(readings: dict, meanings: dict):
+    with open(PARSE_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"parser": PARSER_VERSION, "readings": readings, "meanings": meanings}, f, ensure_ascii=False)
+
+if is_main_process():
+    load_parse_cache()
+
+
+# ---- grading ----
+def expected_answer(prompt: str, payload: dict, meanings: list[str]):
+    """(expected, ideal) strings shown after answering a prompt."""
+    if prompt == "reading":
+        expected = payload.get("reading", "").strip()
+        ideal = payload.get("readingUI", "").strip() or expected
+    else:
+        expected = ", ".join(meanings) if meanings else "(no meanings in Notes)"
+        ideal = meanings[0] if meanings else expected
+    return expected, ideal
+
+def grade_answer(prompt: str, user: str, payload: dict, meanings: list[str]) -> bool:
+    if prompt == "reading":
+        return reading_match(user, payload.get("reading", "").strip())
+    return meaning_match(user, meanings)
+
+def grading_bundle(prompt: str, payload: dict, meanings: list[str]):
+    """
+    Precomputed inputs for static/grading.js, which mirrors meaning_match()
+    and reading_match() so the client can show a verdict before /answer returns.
+    """
+    expected, ideal = expected_answer(prompt, payload, meanings)
+    bundle = {"prompt": prompt, "expected": expected, "ideal": ideal}
+    if prompt == "reading":
+        bundle["reading"] = normalize_reading(html.unescape(payload.get("reading", "")))
+    else:
+        bundle["meanings"] = [mm for mm in (canonical_meaning(m) for m in meanings) if mm]
+    return bundle
+
+
 # ---- card info ----
-def card_payload(card_id: int):
-    info = anki_request("cardsInfo", {"cards": [card_id]})[0]
+def payload_from_info(info: dict):
     fields = info["fields"]
     front = (fields.get("Front", {}).get("value") or "").strip()
     back = (fields.get("Back", {}).get("value") or "").strip()
     notes = (fields.get("Notes", {}).get("value") or "")
-    reading = extract_reading_kana(back)
+    reading, reading_ui = parsed_reading(back)
     return {
         "cardId": int(info["cardId"]),
         "front": front,
         "reading": reading,
-        "readingUI": reading_display(back),
+        "readingUI": reading_ui,
         "notes": notes,
     }
 
+def card_payload(card_id: int):
+    cached = CARD_CACHE.get(card_id)
+    if cached is not None:
+        return cached
+    info = anki_request("cardsInfo", {"cards": [card_id]})[0]
+    return payload_from_info(info)
+
+def prefetch_card_payloads(ids: list[int]):
+    """Fetch payloads for several cards in one cardsInfo call and cache them."""
+    missing = [cid for cid in ids if cid not in CARD_CACHE]
+    if not missing:
+        return
+    infos = anki_request("cardsInfo", {"cards": missing}) or []
+    for info in infos:
+        if info and "fields" in info:
+            cid = int(info["cardId"])
+            CARD_CACHE[cid] = payload_from_info(info)
+            CARD_STATS[cid] = card_stats_from_info(info)
+
+def card_stats_from_info(info: dict):
+    return {k: info.get(k) for k in ("lapses", "interval", "due", "factor", "type", "queue")}
+
+def prefetch_card_stats(ids: list[int], priority, keep: int):
+    """
+    Scheduling fields for a whole backlog, in batched cardsInfo calls, so it
+    can be ranked. The full infos of the `keep` best-ranked cards are held on
+    to and cached as payloads, so the first window needs no second fetch.
+    """
+    best = []  # (priority key, position in ids, info), at most `keep` long
+    pos = 0
+    for i in range(0, len(ids), CARD_STATS_BATCH_SIZE):
+        for info in anki_request("cardsInfo", {"cards": ids[i:i + CARD_STATS_BATCH_SIZE]}) or []:
+            if info and "cardId" in info:
+                cid = int(info["cardId"])
+                CARD_STATS[cid] = card_stats_from_info(info)
+                if keep > 0 and "fields" in info:
+                    best.append((priority(cid), pos, info))
+                    pos += 1
+        if len(best) > keep:
+            best = heapq.nsmallest(keep, best, key=lambda x: x[:2])
+    for _, _, info in best:
+        CARD_CACHE[int(info["cardId"])] = payload_from_info(info)
+
 
 # ---- queue logic ----
+def normalized_due(stats: dict) -> int:
+    """
+    Comparable due value. Review cards store a day number, but learning and
+    relearning cards (queue 1/3, type 1/3) are due now and may store an epoch
+    timestamp, so they sort ahead of every review card.
+    """
+    if stats.get("queue") in (1, 3) or stats.get("type") in (1, 3):
+        return 0
+    return int(stats.get("due") or 0)
+
+def card_priority(card_id: int):
+    """Sort key for the priority order: missed, leeches, then most overdue first."""
+    stats = CARD_STATS.get(card_id, {})
+    return (
+        0 if card_id in MISSED else 1,
+        -int(stats.get("lapses") or 0),
+        normalized_due(stats),
+        int(stats.get("factor") or 0),
+        int(stats.get("interval") or 0),
+    )
+
+# order name -> priority function (None keeps the shuffled deque)
+ORDER_STRATEGIES = {
+    "random": None,
+    "priority": card_priority,
+}
+
+class PriorityQueue:
+    """
+    Drop-in replacement for the SESSION_QUEUE deque, ordered by a heap.
+    Items are keyed by (cardId, prompt); re-pushing an item replaces the
+    old entry lazily, so reordering costs O(log n) instead of a rebuild.
+    The head is pinned once peeked so /next and /answer agree on it.
+    """
+
+    def __init__(self, priority, items=()):
+        self._priority = priority
+        self._seq = itertools.count()
+        self.clear()
+        items = list(items)
+        if items:
+            self._head = self._entry(items[0])
+            self._track(self._head)
+        for item in items[1:]:
+            self.push(item)
+
+    @staticmethod
+    def _item_key(item):
+        return (item["cardId"], item["prompt"])
+
+    def _entry(self, item, key=None, seq=None):
+        # [sort key, tiebreak, item, alive, cooling]
+        if key is None:
+            key = self._priority(item["cardId"])
+        return [key, next(self._seq) if seq is None else seq, item, True, False]
+
+    def _track(self, entry):
+        self._entries[self._item_key(entry[2])] = entry
+        self._card_counts[entry[2]["cardId"]] += 1
+
+    def _discard(self, key):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            old[3] = False
+            cid = key[0]
+            self._card_counts[cid] -= 1
+            if not self._card_counts[cid]:
+                del self._card_counts[cid]
+
+    def push(self, item: dict, delay: int = 0):
+        """Queue (or requeue) an item; delay keeps it out for that many answers."""
+        key = self._item_key(item)
+        if self._head is not None and self._item_key(self._head[2]) == key:
+            return
+        self._discard(key)
+        entry = self._entry(item)
+        self._track(entry)
+        if delay > 0:
+            entry[4] = True
+            self._cooldown.append((self._step + delay, entry))
+        else:
+            heapq.heappush(self._heap, entry)
+
+    def reprioritize(self, card_id: int):
+        for prompt in ("meaning", "reading"):
+            entry = self._entries.get((card_id, prompt))
+            if entry is not None and entry is not self._head and not entry[4]:
+                self.push(entry[2])
+
+    def _pin_head(self):
+        if self._head is not None:
+            return self._head
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[3]:
+                self._head = entry
+                return entry
+        while self._cooldown:
+            _, entry = self._cooldown.popleft()
+            if entry[3]:
+                self._head = entry
+                return entry
+        return None
+
+    def __getitem__(self, index):
+        if index != 0:
+            raise IndexError("PriorityQueue only supports peeking the head")
+        entry = self._pin_head()
+        if entry is None:
+            raise IndexError("peek from an empty queue")
+        return entry[2]
+
+    def popleft(self):
+        item = self[0]
+        self._discard(self._item_key(item))
+        self._head = None
+        self._step += 1
+        while self._cooldown and self._cooldown[0][0] <= self._step:
+            _, entry = self._cooldown.popleft()
+            if entry[3]:
+                entry[4] = False
+                heapq.heappush(self._heap, entry)
+        return item
+
+    def append(self, item: dict):
+        self.push(item)
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+
+    def clear(self):
+        self._heap = []
+        self._entries = {}        # (cardId, prompt) -> live entry
+        self._card_counts = Counter()  # cardId -> live items for that card
+        self._cooldown = deque()  # (ready_step, entry) waiting to re-enter the heap
+        self._step = 0
+        self._head = None
+
+    def card_count(self) -> int:
+        """Distinct cards still queued, kept live so refills don't scan the queue."""
+        return len(self._card_counts)
+
+    def snapshot(self):
+        """Undo state: live entries with their keys, plus the cooldown schedule. O(n), no sort."""
+        def pack(entry):
+            return (entry[0], entry[1], entry[2])
+        return {
+            "step": self._step,
+            "head": pack(self._head) if self._head is not None else None,
+            "heap": [pack(e) for e in self._heap if e[3]],
+            "cooldown": [(ready, pack(e)) for ready, e in self._cooldown if e[3]],
+        }
+
+    @classmethod
+    def from_snapshot(cls, priority, snap: dict):
+        queue = cls(priority)
+        queue._step = snap["step"]
+        max_seq = -1
+        if snap["head"] is not None:
+            queue._head = queue._entry(snap["head"][2], *snap["head"][:2])
+            queue._track(queue._head)
+            max_seq = snap["head"][1]
+        for key, seq, item in snap["heap"]:
+            entry = queue._entry(item, key, seq)
+            queue._track(entry)
+            queue._heap.append(entry)
+            max_seq = max(max_seq, seq)
+        heapq.heapify(queue._heap)
+        for ready, (key, seq, item) in snap["cooldown"]:
+            entry = queue._entry(item, key, seq)
+            entry[4] = True
+            queue._track(entry)
+            queue._cooldown.append((ready, entry))
+            max_seq = max(max_seq, seq)
+        queue._seq = itertools.count(max_seq + 1)
+        return queue
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        """Items in serving order (head first, then heap, then cooldown)."""
+        if self._head is not None:
+            yield self._head[2]
+        for entry in sorted(e for e in self._heap if e[3]):
+            yield entry[2]
+        for _, entry in self._cooldown:
+            if entry[3]:
+                yield entry[2]
+
+def new_session_queue(items=()):
+    """Build the queue container for the current mode and order strategy."""
+    priority = ORDER_STRATEGIES.get(SESSION_ORDER)
+    if SESSION_MODE == "reviews" and priority is not None:
+        return PriorityQueue(priority, items)
+    return deque(items)
+
+def queued_card_count():
+    if isinstance(SESSION_QUEUE, PriorityQueue):
+        return SESSION_QUEUE.card_count()
+    return len({x["cardId"] for x in SESSION_QUEUE})
+
 def build_pair(card_id: int):
     if random.random() < 0.5:
         return [{"cardId": card_id, "prompt": "meaning"},
@@ -373,7 +879,7 @@ def build_lesson_chunk(ids: list[int]):
             "front": payload.get("front", ""),
             "reading": payload.get("readingUI", "") or payload.get("reading", ""),
             "readingKana": payload.get("reading", ""),
-            "meanings": extract_meanings(payload.get("notes", "")),
+            "meanings": parsed_meanings(payload.get("notes", "")),
         })
     return cards
 
@@ -410,9 +916,31 @@ def lesson_start_quiz_phase():
     PASSED.clear()
     HISTORY.clear()
 
+def refill_review_window():
+    """
+    Top the review queue up to REVIEW_WINDOW_SIZE distinct cards,
+    pulling the next pending ids and prefetching their payloads.
+    """
+    global REVIEW_PENDING_POS
+    if REVIEW_PENDING_POS >= len(REVIEW_PENDING_IDS):
+        return
+
+    room = REVIEW_WINDOW_SIZE - queued_card_count()
+    if room <= 0:
+        return
+
+    new_ids = REVIEW_PENDING_IDS[REVIEW_PENDING_POS:REVIEW_PENDING_POS + room]
+    prefetch_card_payloads(new_ids)
+    REVIEW_PENDING_POS += len(new_ids)
+
+    pairs = [build_pair(cid) for cid in new_ids]
+    random.shuffle(pairs)
+    SESSION_QUEUE.extend(x for pair in pairs for x in pair)
+
 def reset_session():
     global SESSION_QUEUE, TOTAL_CARDS, COMPLETED, MISSED, PASSED, HISTORY
     global LESSON_PHASE, LESSON_REMAINING_IDS, LESSON_CHUNK_IDS, LESSON_STUDY_CARDS
+    global REVIEW_PENDING_IDS, REVIEW_PENDING_POS
     SESSION_QUEUE = deque()
     TOTAL_CARDS = 0
     COMPLETED = set()
@@ -423,22 +951,46 @@ def reset_session():
     LESSON_REMAINING_IDS = []
     LESSON_CHUNK_IDS = []
     LESSON_STUDY_CARDS = []
+    REVIEW_PENDING_IDS = []
+    REVIEW_PENDING_POS = 0
+    CARD_CACHE.clear()
+    CARD_STATS.clear()
 
-def configure_session(mode: str | None = None, deck_name: str | None = None):
-    global SESSION_MODE, CURRENT_DECK_NAME
+def parse_review_cap(raw) -> int:
+    try:
+        cap = int(raw)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, cap)
+
+def configure_session(mode: str | None = None, deck_name: str | None = None,
+                      review_cap: int | None = None, order: str | None = None):
+    global SESSION_MODE, CURRENT_DECK_NAME, REVIEW_SESSION_CAP, SESSION_ORDER
     new_mode = (mode or SESSION_MODE or DEFAULT_MODE).lower()
     if new_mode not in {"lessons", "reviews"}:
         new_mode = DEFAULT_MODE
     new_deck = choose_existing_deck(deck_name)
-    changed = (new_mode != SESSION_MODE) or (new_deck != CURRENT_DECK_NAME)
+    new_cap = REVIEW_SESSION_CAP if review_cap is None else review_cap
+    new_order = (order or SESSION_ORDER or DEFAULT_ORDER).lower()
+    if new_order not in ORDER_STRATEGIES:
+        new_order = DEFAULT_ORDER
+    changed = (
+        (new_mode != SESSION_MODE)
+        or (new_deck != CURRENT_DECK_NAME)
+        or (new_cap != REVIEW_SESSION_CAP)
+        or (new_order != SESSION_ORDER)
+    )
     SESSION_MODE = new_mode
     CURRENT_DECK_NAME = new_deck
+    REVIEW_SESSION_CAP = new_cap
+    SESSION_ORDER = new_order
     if changed:
         reset_session()
 
 def start_session_if_needed():
     global SESSION_QUEUE, TOTAL_CARDS, COMPLETED, MISSED, PASSED, HISTORY
     global LESSON_PHASE, LESSON_REMAINING_IDS, LESSON_CHUNK_IDS, LESSON_STUDY_CARDS
+    global REVIEW_PENDING_IDS, REVIEW_PENDING_POS
 
     if SESSION_MODE == "lessons":
         if LESSON_PHASE is None and not LESSON_CHUNK_IDS and not LESSON_REMAINING_IDS:
@@ -454,18 +1006,34 @@ def start_session_if_needed():
             lesson_prepare_next_chunk()
         return
 
-    if SESSION_QUEUE:
+    if SESSION_QUEUE or REVIEW_PENDING_POS < len(REVIEW_PENDING_IDS):
+        refill_review_window()
+        return
+    if REVIEW_SESSION_CAP and REVIEW_PENDING_IDS:
+        # capped session finished; stay done until the session is reset
         return
 
-    ids = mode_card_ids("reviews")
-    TOTAL_CARDS = len(ids)
-    pairs = [build_pair(cid) for cid in ids]
-    random.shuffle(pairs)
-    SESSION_QUEUE = deque([x for pair in pairs for x in pair])
+    # Shuffle only the ids; pairs are built per window as cards complete.
+    ids = list(mode_card_ids("reviews"))
+    random.shuffle(ids)
+    CARD_CACHE.clear()
+    CARD_STATS.clear()
     COMPLETED.clear()
     MISSED.clear()
+    priority = ORDER_STRATEGIES.get(SESSION_ORDER)
+    if priority is not None:
+        # rank the whole backlog, not just the window (shuffle above breaks ties)
+        prefetch_card_stats(ids, priority, min(REVIEW_WINDOW_SIZE, REVIEW_SESSION_CAP or REVIEW_WINDOW_SIZE))
+        ids.sort(key=priority)
+    if REVIEW_SESSION_CAP:
+        ids = ids[:REVIEW_SESSION_CAP]
+    TOTAL_CARDS = len(ids)
+    REVIEW_PENDING_IDS = ids
+    REVIEW_PENDING_POS = 0
+    SESSION_QUEUE = new_session_queue()
     PASSED.clear()
     HISTORY.clear()
+    refill_review_window()
 
 def remaining_cards():
     return max(0, TOTAL_CARDS - len(COMPLETED))
@@ -475,12 +1043,12 @@ def completed_cards():
 
 def remove_prompts_for_card(card_id: int):
     global SESSION_QUEUE
-    SESSION_QUEUE = deque([x for x in SESSION_QUEUE if x["cardId"] != card_id])
+    SESSION_QUEUE = new_session_queue([x for x in SESSION_QUEUE if x["cardId"] != card_id])
 
 def remove_prompt_instance(card_id: int, prompt: str):
     """Remove any existing queued instance of this exact prompt for this card."""
     global SESSION_QUEUE
-    SESSION_QUEUE = deque([
+    SESSION_QUEUE = new_session_queue([
         x for x in SESSION_QUEUE
         if not (x["cardId"] == card_id and x["prompt"] == prompt)
     ])
@@ -495,6 +1063,12 @@ def insert_item_later(item: dict):
     card_id = item["cardId"]
     prompt = item["prompt"]
 
+    if isinstance(SESSION_QUEUE, PriorityQueue):
+        # O(log n): requeue after a short cooldown and bump the sibling prompt
+        SESSION_QUEUE.push(item, delay=REINSERT_MIN_INDEX)
+        SESSION_QUEUE.reprioritize(card_id)
+        return
+
     # Ensure we don't duplicate the same prompt multiple times
     remove_prompt_instance(card_id, prompt)
 
@@ -531,26 +1105,252 @@ def insert_pair_later(card_id: int):
 
 def snapshot(did_anki: bool):
     return {
-        "queue": list(SESSION_QUEUE),
+        "queue": SESSION_QUEUE.snapshot() if isinstance(SESSION_QUEUE, PriorityQueue) else list(SESSION_QUEUE),
         "total": TOTAL_CARDS,
         "completed": list(COMPLETED),
         "missed": list(MISSED),
         "passed": {cid: list(v) for cid, v in PASSED.items()},
+        "pending_pos": REVIEW_PENDING_POS,
         "did_anki": bool(did_anki),
     }
 
 def restore_snapshot(snap):
-    global SESSION_QUEUE, TOTAL_CARDS, COMPLETED, MISSED, PASSED
-    SESSION_QUEUE = deque(snap.get("queue", []))
+    global SESSION_QUEUE, TOTAL_CARDS, COMPLETED, MISSED, PASSED, REVIEW_PENDING_POS
+    queue_snap = snap.get("queue", [])
+    if isinstance(queue_snap, dict):
+        SESSION_QUEUE = PriorityQueue.from_snapshot(ORDER_STRATEGIES[SESSION_ORDER], queue_snap)
+    else:
+        SESSION_QUEUE = new_session_queue(queue_snap)
     TOTAL_CARDS = int(snap.get("total", 0))
     COMPLETED = set(snap.get("completed", []))
     MISSED = set(snap.get("missed", []))
     PASSED = {int(cid): set(v) for cid, v in snap.get("passed", {}).items()}
+    REVIEW_PENDING_POS = int(snap.get("pending_pos", REVIEW_PENDING_POS))
 
 def submit_to_anki(card_id: int, force_learned: bool = False):
     ease = 3 if force_learned else (1 if card_id in MISSED else 3)
     anki_request("answerCards", {"answers": [{"cardId": card_id, "ease": ease}]})
 
+def undo_answer(snap):
+    """Roll back one /answer: Anki's copy, the session state and the answer log."""
+    if snap.get("did_anki"):
+        anki_undo_safe()
+    restore_snapshot(snap)
+    log_answer_undo(snap.get("answer_event"))
+
+# ---- answer log ----
+ANSWER_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    card_id INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    response_ms INTEGER,
+    mode TEXT NOT NULL,
+    deck TEXT NOT NULL,
+    undo INTEGER NOT NULL DEFAULT 0  -- 1 = retracts an earlier identical event
+);
+CREATE TABLE IF NOT EXISTS card_stats (
+    deck TEXT NOT NULL,
+    card_id INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    PRIMARY KEY (deck, card_id)
+);
+CREATE TABLE IF NOT EXISTS prompt_stats (
+    deck TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    PRIMARY KEY (deck, prompt)
+);
+CREATE TABLE IF NOT EXISTS response_hist (
+    deck TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (deck, bucket)
+);
+"""
+
+ANSWER_LOG_QUEUE = queue.Queue()
+_answer_log_thread = None
+_answer_log_lock = threading.Lock()
+ANSWER_LOG_DISABLED = False   # set once if the log file cannot be opened
+
+def answer_log_connect():
+    conn = sqlite3.connect(ANSWER_LOG_FILE, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(ANSWER_LOG_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(answer_events)")}
+    if "undo" not in columns:
+        conn.execute("ALTER TABLE answer_events ADD COLUMN undo INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+def write_answer_events(conn, events: list[tuple]):
+    """
+    Append events and fold them into the aggregate tables in one transaction.
+    Undo events subtract what the matching answer added.
+    """
+    with conn:
+        conn.executemany(
+            "INSERT INTO answer_events (ts, card_id, prompt, correct, response_ms, mode, deck, undo) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            events,
+        )
+        for ts, card_id, prompt, correct, response_ms, mode, deck, undo in events:
+            sign = -1 if undo else 1
+            miss = 0 if correct else sign
+            conn.execute(
+                "INSERT INTO card_stats (deck, card_id, attempts, misses) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(deck, card_id) DO UPDATE SET "
+                "attempts = attempts + excluded.attempts, misses = misses + excluded.misses",
+                (deck, card_id, sign, miss),
+            )
+            conn.execute(
+                "INSERT INTO prompt_stats (deck, prompt, attempts, misses) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(deck, prompt) DO UPDATE SET "
+                "attempts = attempts + excluded.attempts, misses = misses + excluded.misses",
+                (deck, prompt, sign, miss),
+            )
+            if response_ms is not None:
+                bucket = min(response_ms, RESPONSE_MAX_MS) // RESPONSE_BUCKET_MS
+                conn.execute(
+                    "INSERT INTO response_hist (deck, bucket, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT(deck, bucket) DO UPDATE SET count = count + excluded.count",
+                    (deck, bucket, sign),
+                )
+
+def answer_log_worker():
+    global ANSWER_LOG_DISABLED
+    try:
+        conn = answer_log_connect()
+    except Exception as e:
+        # e.g. a read-only install directory: stop logging instead of
+        # restarting a dying worker on every answer.
+        print(f"answer log disabled, cannot open {ANSWER_LOG_FILE}: {e}")
+        ANSWER_LOG_DISABLED = True
+        while True:
+            try:
+                ANSWER_LOG_QUEUE.get_nowait()
+            except queue.Empty:
+                return
+            ANSWER_LOG_QUEUE.task_done()
+    while True:
+        events = [ANSWER_LOG_QUEUE.get()]
+        while len(events) < ANSWER_LOG_BATCH:
+            try:
+                events.append(ANSWER_LOG_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            write_answer_events(conn, events)
+        except Exception as e:
+            print(f"answer log write failed: {e}")
+        finally:
+            for _ in events:
+                ANSWER_LOG_QUEUE.task_done()
+
+def ensure_answer_log_worker():
+    global _answer_log_thread
+    with _answer_log_lock:
+        if ANSWER_LOG_DISABLED:
+            return
+        if _answer_log_thread is None or not _answer_log_thread.is_alive():
+            _answer_log_thread = threading.Thread(target=answer_log_worker, daemon=True)
+            _answer_log_thread.start()
+
+def log_answer(card_id: int, prompt: str, correct: bool, response_ms=None):
+    """
+    Queue a graded answer for the background writer; never blocks /answer.
+    Returns the queued event so an undo can retract it, or None if logging is off.
+    """
+    if ANSWER_LOG_DISABLED:
+        return None
+    try:
+        ms = int(response_ms) if response_ms is not None else None
+    except (TypeError, ValueError):
+        ms = None
+    if ms is not None and ms < 0:
+        ms = None
+    event = (
+        time.time(), int(card_id), prompt, 1 if correct else 0,
+        ms, SESSION_MODE, CURRENT_DECK_NAME, 0,
+    )
+    ensure_answer_log_worker()
+    ANSWER_LOG_QUEUE.put(event)
+    return event
+
+def log_answer_undo(event):
+    """Append an undo event that cancels an earlier answer in the aggregates."""
+    if event is None or ANSWER_LOG_DISABLED:
+        return
+    ensure_answer_log_worker()
+    ANSWER_LOG_QUEUE.put((time.time(),) + tuple(event[1:7]) + (1,))
+
+def response_percentiles(hist: list[tuple[int, int]], points=(50, 90, 99)):
+    """Percentiles (ms, bucket upper bound) from sorted (bucket, count) rows."""
+    total = sum(count for _, count in hist)
+    out = {}
+    if not total:
+        return {f"p{p}": None for p in points}
+    for p in points:
+        target = total * p / 100
+        seen = 0
+        for bucket, count in hist:
+            seen += count
+            if seen >= target:
+                out[f"p{p}"] = (bucket + 1) * RESPONSE_BUCKET_MS
+                break
+    return out
+
+def answer_stats(deck: str | None = None, limit: int = 20):
+    """Aggregate accuracy, worst cards and response times from the summary tables."""
+    if not os.path.exists(ANSWER_LOG_FILE):
+        return {
+            "attempts": 0, "misses": 0, "accuracy": None,
+            "prompts": {}, "worstCards": [],
+            "responseMs": response_percentiles([]),
+        }
+    where = "WHERE deck = ?" if deck else ""
+    args = (deck,) if deck else ()
+    conn = answer_log_connect()
+    try:
+        prompts = {}
+        for prompt, attempts, misses in conn.execute(
+            f"SELECT prompt, SUM(attempts), SUM(misses) FROM prompt_stats {where} GROUP BY prompt", args
+        ):
+            prompts[prompt] = {
+                "attempts": attempts,
+                "misses": misses,
+                "accuracy": (attempts - misses) / attempts if attempts else None,
+            }
+        worst = [
+            {"cardId": cid, "attempts": attempts, "misses": misses, "missRate": misses / attempts}
+            for cid, attempts, misses in conn.execute(
+                f"SELECT card_id, SUM(attempts) AS a, SUM(misses) AS m FROM card_stats {where} "
+                "GROUP BY card_id HAVING m > 0 AND a > 0 ORDER BY CAST(m AS REAL) / a DESC, m DESC LIMIT ?",
+                args + (limit,),
+            )
+        ]
+        hist = conn.execute(
+            f"SELECT bucket, SUM(count) FROM response_hist {where} GROUP BY bucket ORDER BY bucket", args
+        ).fetchall()
+    finally:
+        conn.close()
+
+    attempts = sum(p["attempts"] for p in prompts.values())
+    misses = sum(p["misses"] for p in prompts.values())
+    return {
+        "attempts": attempts,
+        "misses": misses,
+        "accuracy": (attempts - misses) / attempts if attempts else None,
+        "prompts": prompts,
+        "worstCards": worst,
+        "responseMs": response_percentiles(hist),
+    }
+
 def api_error(route: str, err: Exception):
     return jsonify({"ok": False, "error": f"{route} failed: {err}"}), 200
 
@@ -564,7 +1364,11 @@ def splash():
 
 @app.route("/study/<mode>")
 def study(mode):
-    configure_session(mode=mode)
+    configure_session(
+        mode=mode,
+        review_cap=parse_review_cap(request.args.get("limit")),
+        order=request.args.get("order") or DEFAULT_ORDER,
+    )
     title_mode = "Lessons" if SESSION_MODE == "lessons" else "Reviews"
     ctx = template_base_context()
     return render_template("index.html", study_mode=title_mode, deck_name=CURRENT_DECK_NAME, **ctx)
@@ -614,6 +1418,7 @@ def splash_data():
             "reviewsAvailable": reviews_available,
             "lessonsAvailable": lessons_available,
             "decks": available_decks(),
+            "backend": BACKEND["name"],
         }), 200
     except Exception as e:
         return jsonify({
@@ -632,6 +1437,28 @@ def splash_data():
             ],
         }), 200
 
+@app.route("/api/backend")
+def backend_status():
+    return jsonify({
+        "ok": True,
+        "name": BACKEND["name"],
+        "url": BACKEND["url"],
+        "maxConcurrent": BACKEND["maxConcurrent"],
+        "health": backend_health(),
+    }), 200
+
+@app.route("/api/stats")
+def stats():
+    try:
+        deck = (request.args.get("deck") or "").strip() or None
+        try:
+            limit = max(1, min(500, int(request.args.get("limit", 20))))
+        except ValueError:
+            limit = 20
+        return jsonify({"ok": True, "deck": deck, **answer_stats(deck, limit)}), 200
+    except Exception as e:
+        return api_error("/api/stats", e)
+
 @app.route("/set_deck", methods=["POST"])
 def set_deck():
     try:
@@ -687,13 +1514,14 @@ def next_card():
         item = SESSION_QUEUE[0]
         cid = item["cardId"]
         payload = card_payload(cid)
-        meanings = extract_meanings(payload.get("notes", ""))
+        meanings = parsed_meanings(payload.get("notes", ""))
 
         return jsonify({
             "done": False,
             "card": payload,
             "meanings": meanings,
             "prompt": item["prompt"],
+            "grading": grading_bundle(item["prompt"], payload, meanings),
             "remaining": remaining_cards(),
             "completed": completed_cards(),
             "total": TOTAL_CARDS,
@@ -717,53 +1545,59 @@ def answer():
 
         prompt = SESSION_QUEUE[0]["prompt"]
         payload = card_payload(card_id)
-        meanings = extract_meanings(payload.get("notes", ""))
+        meanings = parsed_meanings(payload.get("notes", ""))
 
         # Snapshot before mutating
         HISTORY.append(snapshot(did_anki=False))
-
-        # consume this prompt
-        SESSION_QUEUE.popleft()
-
-        if prompt == "reading":
-            expected = payload.get("reading", "").strip()
-            ideal = payload.get("readingUI", "").strip() or expected
-            correct = reading_match(user, expected)
-        else:
-            expected = ", ".join(meanings) if meanings else "(no meanings in Notes)"
-            ideal = meanings[0] if meanings else expected
-            correct = meaning_match(user, meanings)
-
-        if not correct:
-            MISSED.add(card_id)
-            COMPLETED.discard(card_id)
-
-            # Reinsert ONLY the prompt that was missed (meaning OR reading)
-            insert_item_later({"cardId": card_id, "prompt": prompt})
-
-            return jsonify({
-                "ok": True,
-                "correct": False,
-                "prompt": prompt,
-                "expected": expected,
-                "ideal": ideal,
-                "remaining": remaining_cards(),
-                "completed": completed_cards(),
-                "total": TOTAL_CARDS
-            }), 200
-
-        # correct: record pass
-        passed = PASSED.get(card_id, set())
-        passed.add(prompt)
-        PASSED[card_id] = passed
-
-        did_anki = False
-        if "meaning" in passed and "reading" in passed:
-            submit_to_anki(card_id, force_learned=(SESSION_MODE == "lessons"))
-            did_anki = True
-            COMPLETED.add(card_id)
-
-        HISTORY[-1]["did_anki"] = did_anki
+        try:
+            # consume this prompt
+            SESSION_QUEUE.popleft()
+
+            expected, ideal = expected_answer(prompt, payload, meanings)
+            correct = grade_answer(prompt, user, payload, meanings)
+
+            HISTORY[-1]["answer_event"] = log_answer(card_id, prompt, correct, data.get("responseMs"))
+
+            if not correct:
+                MISSED.add(card_id)
+                COMPLETED.discard(card_id)
+
+                # Reinsert ONLY the prompt that was missed (meaning OR reading)
+                insert_item_later({"cardId": card_id, "prompt": prompt})
+
+                return jsonify({
+                    "ok": True,
+                    "correct": False,
+                    "prompt": prompt,
+                    "expected": expected,
+                    "ideal": ideal,
+                    "remaining": remaining_cards(),
+                    "completed": completed_cards(),
+                    "total": TOTAL_CARDS
+                }), 200
+
+            # correct: record pass
+            passed = PASSED.get(card_id, set())
+            passed.add(prompt)
+            PASSED[card_id] = passed
+
+            did_anki = "meaning" in passed and "reading" in passed
+            if did_anki:
+                submit_to_anki(card_id, force_learned=(SESSION_MODE == "lessons"))
+                HISTORY[-1]["did_anki"] = True
+                COMPLETED.add(card_id)
+                # done with this card; an undo refetches it, so edits in Anki show up
+                CARD_CACHE.pop(card_id, None)
+        except Exception:
+            # e.g. Anki busy or unreachable: put the prompt back so it can be retried
+            undo_answer(HISTORY.pop())
+            raise
+
+        if did_anki and SESSION_MODE == "reviews":
+            try:
+                refill_review_window()
+            except Exception:
+                pass  # Anki has the answer; /next tops the window up on its next call
 
         return jsonify({
             "ok": True,
@@ -792,10 +1626,7 @@ def undo():
                 "total": TOTAL_CARDS
             }), 200
 
-        snap = HISTORY.pop()
-        if snap.get("did_anki"):
-            anki_undo_safe()
-        restore_snapshot(snap)
+        undo_answer(HISTORY.pop())
 
         return jsonify({
             "ok": True,
@@ -806,18 +1637,373 @@ def undo():
     except Exception as e:
         return api_error("/undo", e)
 
-def open_browser():
+# ---- deck lint ----
+def lint_note(note: dict):
+    """Parse one note like a review would and list anything that will misbehave."""
+    fields = note.get("fields", {})
+    front = (fields.get("Front", {}).get("value") or "").strip()
+    back = (fields.get("Back", {}).get("value") or "").strip()
+    notes = (fields.get("Notes", {}).get("value") or "")
+
+    reading = extract_reading_kana(back)
+    display = reading_display(back)
+    meanings = extract_meanings(notes)
+
+    issues = []
+    if not front:
+        issues.append("empty Front")
+    if not back:
+        issues.append("empty Back")
+    elif back.count("[") != back.count("]"):
+        issues.append("unbalanced furigana brackets in Back")
+    else:
+        # extract_reading_kana() strips leftover kanji and keeps tags, so
+        # check the raw field rather than the parsed reading.
+        if _TAG_RE.search(back):
+            issues.append(f"HTML markup in Back (breaks furigana): {back!r}")
+        resolved = back
+        while True:
+            new_resolved = KANJI_FURIGANA_RE.sub(r"\2", resolved)
+            if new_resolved == resolved:
+                break
+            resolved = new_resolved
+        if not BRACKET_RE.search(resolved) and KANJI_RE.search(resolved):
+            issues.append(f"kanji without a [reading] in Back: {back!r}")
+        if not reading or "[" in reading or "]" in reading:
+            issues.append(f"unparsable furigana in Back: {back!r}")
+    if not notes.strip():
+        issues.append("empty Notes")
+    elif not meanings:
+        issues.append("Notes has no meanings")
+    elif not any(canonical_meaning(m) for m in meanings):
+        issues.append(f"meanings collapse to nothing: {meanings!r}")
+
+    return {
+        "noteId": note.get("noteId"),
+        "cards": note.get("cards", []),
+        "front": front,
+        "back": back,
+        "notes": notes,
+        "reading": [reading, display],
+        "meanings": meanings,
+        "issues": issues,
+    }
+
+def lint_note_batch(notes: list[dict]):
+    return [lint_note(n) for n in notes]
+
+def lint_deck(deck: str, workers: int | None = None):
+    """
+    Fetch every note of a deck in batched notesInfo calls and parse them
+    in a process pool while the next batch is being fetched.
+    """
+    note_ids = anki_request("findNotes", {"query": f'deck:"{deck}"'}) or []
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i in range(0, len(note_ids), LINT_BATCH_SIZE):
+            batch = anki_request("notesInfo", {"notes": note_ids[i:i + LINT_BATCH_SIZE]}) or []
+            futures.append(pool.submit(lint_note_batch, [n for n in batch if n]))
+        for fut in futures:
+            results.extend(fut.result())
+    return results
+
+def run_lint(args):
+    deck = args.deck or DECK_NAME
+    start = time.perf_counter()
+    results = lint_deck(deck, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    problems = [r for r in results if r["issues"]]
+    for r in problems:
+        print(f"note {r['noteId']} {r['front'] or '(no front)'}: {'; '.join(r['issues'])}")
+    print(f"Checked {len(results)} notes in deck \"{deck}\" in {elapsed:.2f}s, {len(problems)} with problems.")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({
+                "deck": deck,
+                "checked": len(results),
+                "problems": [
+                    {k: r[k] for k in ("noteId", "cards", "front", "issues")} for r in problems
+                ],
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.report}")
+
+    if not args.no_cache:
+        readings = dict(READING_CACHE)
+        meanings = dict(MEANING_CACHE)
+        for r in results:
+            readings[r["back"]] = r["reading"]
+            meanings[r["notes"]] = r["meanings"]
+        save_parse_cache(readings, meanings)
+        print(f"Parse cache written to {PARSE_CACHE_FILE}")
+    return 1 if problems else 0
+
+# ---- grading vectors ----
+NODE_GRADER = (
+    "const g = require(process.argv[1]);"
+    "const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+    "process.stdout.write(JSON.stringify(cases.map((c) => g.gradeAnswer(c.bundle, c.user).correct)));"
+)
+
+def load_grading_cases():
+    """Grading vectors expanded into (case, bundle) pairs built by the server code."""
+    with open(GRADING_VECTORS_FILE, "r", encoding="utf-8") as f:
+        vectors = json.load(f)
+    cases = []
+    for v in vectors:
+        if v["prompt"] == "reading":
+            payload, meanings = {"reading": v["reading"], "readingUI": v["reading"]}, []
+        else:
+            payload, meanings = {}, v["meanings"]
+        cases.append({
+            "vector": v,
+            "payload": payload,
+            "meanings": meanings,
+            "bundle": grading_bundle(v["prompt"], payload, meanings),
+            "user": v["user"],
+        })
+    return cases
+
+def run_check_grading(args):
+    """Run the shared grading vectors through app.py and static/grading.js."""
+    cases = load_grading_cases()
+    failures = 0
+    for c in cases:
+        got = grade_answer(c["vector"]["prompt"], c["user"], c["payload"], c["meanings"])
+        if got != c["vector"]["correct"]:
+            failures += 1
+            print(f"python: {c['vector']} -> {got}")
+
+    node = shutil.which("node")
+    if node is None:
+        print("node not found; skipped static/grading.js")
+    else:
+        try:
+            proc = subprocess.run(
+                [node, "-e", NODE_GRADER, os.path.join(STATIC_DIR, "grading.js")],
+                input=json.dumps([{"bundle": c["bundle"], "user": c["user"]} for c in cases]),
+                capture_output=True, text=True, encoding="utf-8", check=True,
+            )
+            results = json.loads(proc.stdout)
+        except subprocess.CalledProcessError as e:
+            failures += len(cases)
+            print(f"grading.js failed to run (exit {e.returncode}):\n{e.stderr.strip()}")
+        except ValueError as e:
+            failures += len(cases)
+            print(f"grading.js printed unreadable output: {e}")
+        else:
+            for c, got in zip(cases, results):
+                if got != c["vector"]["correct"]:
+                    failures += 1
+                    print(f"grading.js: {c['vector']} -> {got}")
+
+    print(f"Checked {len(cases)} grading vectors, {failures} failures.")
+    return 1 if failures else 0
+
+# ---- profiling ----
+# Only installed when enabled (WK_PROFILE=sample|cprofile or --profile),
+# so requests carry no hooks at all otherwise.
+_profile_lock = threading.Lock()
+_profile_cprofile_lock = threading.Lock()
+_profile_active = {}      # thread ident -> route being sampled
+_profile_samples = {}     # route -> Counter(collapsed stack -> samples)
+_profile_stats = {}       # route -> pstats.Stats
+_profile_requests = 0
+_profile_sampler_pid = None   # process the sampler thread runs in (threads don't survive fork)
+
+def profile_route_name(path: str) -> str:
+    return path.strip("/").replace("/", "_") or "root"
+
+def collapse_stack(frame) -> str:
+    # label frames by module (flask.app vs __main__), file name only as a fallback
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+        parts.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+def profile_sampler():
+    while True:
+        time.sleep(PROFILE_SAMPLE_INTERVAL)
+        with _profile_lock:
+            if not _profile_active:
+                continue
+            active = dict(_profile_active)
+        frames = sys._current_frames()
+        with _profile_lock:
+            for ident, route in active.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = f"{route};{collapse_stack(frame)}"
+                    _profile_samples.setdefault(route, Counter())[stack] += 1
+
+def dump_profiles():
+    """Write <route>.folded (flamegraph.pl / speedscope) and <route>.pstats files."""
+    with _profile_lock:
+        samples = {route: Counter(c) for route, c in _profile_samples.items()}
+        stats = dict(_profile_stats)
+    if not samples and not stats:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    for route, counter in samples.items():
+        with open(os.path.join(PROFILE_DIR, f"{route}.folded"), "w", encoding="utf-8") as f:
+            for stack, count in counter.most_common():
+                f.write(f"{stack} {count}\n")
+    with _profile_lock:
+        for route, st in stats.items():
+            st.dump_stats(os.path.join(PROFILE_DIR, f"{route}.pstats"))
+
+def ensure_profile_sampler():
+    """Start the sampler in the process actually serving requests, once."""
+    global _profile_sampler_pid
+    if _profile_sampler_pid == os.getpid():
+        return
+    with _profile_lock:
+        if _profile_sampler_pid == os.getpid():
+            return
+        _profile_sampler_pid = os.getpid()
+    threading.Thread(target=profile_sampler, daemon=True).start()
+
+def profile_before_request():
+    if request.path not in PROFILE_ROUTES:
+        return
+    route = profile_route_name(request.path)
+    g.profile_route = route
+    if PROFILE_MODE == "cprofile":
+        # cProfile can only run once at a time; overlapping requests go unprofiled.
+        if _profile_cprofile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+    else:
+        ensure_profile_sampler()
+        with _profile_lock:
+            _profile_active[threading.get_ident()] = route
+
+def profile_teardown_request(exc=None):
+    global _profile_requests
+    route = g.pop("profile_route", None)
+    if route is None:
+        return
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_cprofile_lock.release()
+    with _profile_lock:
+        _profile_active.pop(threading.get_ident(), None)
+        if profiler is not None:
+            if route in _profile_stats:
+                _profile_stats[route].add(profiler)
+            else:
+                _profile_stats[route] = pstats.Stats(profiler)
+        _profile_requests += 1
+        dump_now = _profile_requests % PROFILE_DUMP_EVERY == 0
+    if dump_now:
+        dump_profiles()
+
+def enable_profiling(mode: str):
+    global PROFILE_MODE
+    mode = {"1": "sample", "true": "sample"}.get(mode, mode)
+    if mode not in PROFILE_MODES or PROFILE_MODE is not None:
+        return
+    PROFILE_MODE = mode
+    app.before_request(profile_before_request)
+    app.teardown_request(profile_teardown_request)
+    # The sampler thread starts with the first profiled request, so a parent
+    # that only forks per-backend servers never runs one of its own.
+    atexit.register(dump_profiles)
+    print(f"Profiling {', '.join(sorted(PROFILE_ROUTES))} ({mode}); output goes to {PROFILE_DIR}")
+
+PROFILE_MODE = None
+if is_main_process():
+    enable_profiling((os.environ.get("WK_PROFILE") or "").strip().lower())
+
+def open_browser(port: int = DEFAULT_PORT):
     time.sleep(0.7)
-    webbrowser.open("http://127.0.0.1:5000")
+    webbrowser.open(f"http://127.0.0.1:{port}")
 
 
-if __name__ == "__main__":
-    print("WaniKani Anki app is running at http://127.0.0.1:5000")
+def serve_app(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, browser: bool = True):
+    print(f"WaniKani Anki app is running at http://{host}:{port} (Anki: {BACKEND['name']} at {BACKEND['url']})")
     print("Keep this window open while using the app.")
-    threading.Thread(target=open_browser, daemon=True).start()
+    if browser:
+        threading.Thread(target=open_browser, args=(port,), daemon=True).start()
     try:
         from waitress import serve
-        serve(app, host="127.0.0.1", port=5000)
+        serve(app, host=host, port=port)
     except Exception:
-        app.run(host="127.0.0.1", port=5000, debug=False, use_reloader=False)
+        app.run(host=host, port=port, debug=False, use_reloader=False)
+
+def serve_backend(backend: dict, host: str, profile: str | None = None, browser: bool = False):
+    """Process entry point: one server per backend, bound to its own port."""
+    select_backend(backend)
+    if not READING_CACHE and not MEANING_CACHE:
+        load_parse_cache()  # spawned children start with empty caches
+    if profile:
+        enable_profiling(profile)
+    try:
+        serve_app(host, backend["port"], browser=browser)
+    finally:
+        # multiprocessing children exit without running atexit handlers
+        if PROFILE_MODE is not None:
+            dump_profiles()
+
+def serve_backends(backends: list[dict], host: str, profile: str | None = None):
+    if len(backends) == 1:
+        serve_backend(backends[0], host, profile, browser=True)
+        return
+    procs = [
+        multiprocessing.Process(
+            target=serve_backend, args=(backend, host, profile, i == 0), name=f"anki-{backend['name']}"
+        )
+        for i, backend in enumerate(backends)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        # children got the same Ctrl+C; give them a moment to write profiles
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WaniKani-style review app for Anki.")
+    parser.add_argument("--profile", choices=sorted(PROFILE_MODES),
+                        help="profile /next, /answer and /undo and write results to profiles/")
+    parser.add_argument("--host", help=f"address to listen on (default from backends.json, else {DEFAULT_HOST})")
+    parser.add_argument("--backend", help="only serve (or lint) this backend from backends.json")
+    sub = parser.add_subparsers(dest="command")
+    lint = sub.add_parser("lint", help="check every note of a deck for fields that will not parse")
+    lint.add_argument("--deck", help=f'deck to check (default "{DECK_NAME}")')
+    lint.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    lint.add_argument("--report", help="also write the problem list as JSON to this path")
+    lint.add_argument("--no-cache", action="store_true", help=f"do not write {os.path.basename(PARSE_CACHE_FILE)}")
+    lint.add_argument("--backend", default=argparse.SUPPRESS, help="backend from backends.json to lint")
+    sub.add_parser("check-grading", help="run the shared grading vectors against the server and client graders")
+    args = parser.parse_args(argv)
+
+    host, backends = load_backends()
+    host = args.host or host
+    if args.backend:
+        backends = [find_backend(backends, args.backend)]
+
+    if args.command == "lint":
+        select_backend(backends[0])
+        return run_lint(args)
+    if args.command == "check-grading":
+        return run_check_grading(args)
+    serve_backends(backends, host, args.profile or PROFILE_MODE)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
 
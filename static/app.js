@@ -1,7 +1,11 @@
 let current = null;
+let currentGrading = null; // bundle from /next for static/grading.js
+let pendingAnswer = null;  // server confirmation of a locally graded answer
 let currentPrompt = "reading";
 let state = "question"; // "question" | "result" | "lesson_study"
 
+let questionShownAt = 0;
+
 let lessonChunk = [];
 let lessonIndex = 0;
 
@@ -250,6 +254,7 @@ answer.addEventListener("input", () => {
 });
 
 async function loadCard() {
+  if (pendingAnswer) await pendingAnswer;
   resetResultUI();
 
   const res = await fetch("/next", { cache: "no-store" });
@@ -286,6 +291,7 @@ async function loadCard() {
   setLessonStudyVisible(false);
 
   current = data.card;
+  currentGrading = data.grading || null;
   applyPromptUI(data.prompt);
   loadNotesForCurrentCard();
 
@@ -296,30 +302,11 @@ async function loadCard() {
   answer.disabled = false;
   answer.value = "";
   answer.focus();
+  questionShownAt = performance.now();
 }
 
-async function submit() {
-  if (!current) return;
-  const user = (answer.value || "").trim();
-
-  let out;
-  try {
-    const res = await fetch("/answer", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ cardId: current.cardId, answer: user })
-    });
-    out = await res.json();
-  } catch (e) {
-    showHint("Network/server error. Press Enter to retry.");
-    return;
-  }
-
-  if (out && out.ok === false) {
-    showHint(out.error || "Server error. Press Enter to retry.");
-    return;
-  }
-
+function renderResult(out) {
+  resetResultUI();
   state = "result";
   answer.disabled = true;
 
@@ -332,6 +319,7 @@ async function submit() {
   if (out.correct) {
     resultStrip.classList.add("good");
     resultText.textContent = out.ideal || out.expected || "OK";
+    setBigText(current.front || "-");
     setTheme("good");
     hint.textContent = "Press Enter to continue - Backspace/Ctrl+Z to undo";
   } else {
@@ -345,10 +333,71 @@ async function submit() {
     hint.textContent = "Press Enter to continue - Backspace/Ctrl+Z to undo";
   }
 
-  setProgress(out.remaining, out.total, out.completed || 0);
+  if (out.total !== undefined) setProgress(out.remaining, out.total, out.completed || 0);
+}
+
+function backToQuestion(message) {
+  resetResultUI();
+  state = "question";
+  setBigText(current.front || "-");
+  answer.disabled = false;
+  answer.focus();
+  showHint(message);
+}
+
+async function postAnswer(user, responseMs) {
+  const res = await fetch("/answer", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ cardId: current.cardId, answer: user, responseMs })
+  });
+  return res.json();
+}
+
+async function submit() {
+  if (!current || pendingAnswer) return;
+  const user = (answer.value || "").trim();
+  const responseMs = Math.round(performance.now() - questionShownAt);
+  const request = postAnswer(user, responseMs);
+
+  // Show the local verdict now; the server's answer wins if they disagree.
+  if (currentGrading && window.WKGrading) {
+    const local = window.WKGrading.gradeAnswer(currentGrading, user);
+    renderResult(local);
+    pendingAnswer = request
+      .then((out) => {
+        if (out && out.ok === false) {
+          backToQuestion(out.error || "Server error. Press Enter to retry.");
+        } else if (out.correct !== local.correct) {
+          renderResult(out);
+        } else {
+          setProgress(out.remaining, out.total, out.completed || 0);
+        }
+      })
+      .catch(() => backToQuestion("Network/server error. Press Enter to retry."))
+      .finally(() => { pendingAnswer = null; });
+    return;
+  }
+
+  let out;
+  try {
+    out = await request;
+  } catch (e) {
+    showHint("Network/server error. Press Enter to retry.");
+    return;
+  }
+
+  if (out && out.ok === false) {
+    showHint(out.error || "Server error. Press Enter to retry.");
+    return;
+  }
+
+  renderResult(out);
 }
 
 async function undoLast() {
+  if (pendingAnswer) await pendingAnswer;
+  if (state !== "result") return;
   let out;
   try {
     const res = await fetch("/undo", { method: "POST" });
@@ -0,0 +1,77 @@
+// Client-side grader. Mirrors meaning_match()/reading_match() in app.py so a
+// verdict can be shown before /answer returns; the server stays authoritative.
+// Keep in sync with app.py and check with `python app.py check-grading`.
+// Typed answers are plain text and are never HTML-unescaped; entities in the
+// Anki fields are unescaped by the server before the bundle is built.
+(function (root) {
+  function normalizeMeaning(s) {
+    s = (s || "").trim().toLowerCase();
+    s = s.replace(/’/g, "'");
+    s = s.replace(/'/g, "");
+    s = s.replace(/[()]/g, " ");
+    s = s.replace(/[^a-z0-9\s]/g, " ");
+    return s.replace(/\s+/g, " ").trim();
+  }
+
+  function canonicalMeaning(s) {
+    s = normalizeMeaning(s);
+    if (s.startsWith("to ")) s = s.slice(3).trim();
+    s = s.replace(/\bone\b/g, "you");
+    const words = s.split(" ").filter((w) => w && w !== "a" && w !== "an" && w !== "the");
+    return words.join(" ").trim();
+  }
+
+  // meanings: canonical meanings from the server's grading bundle.
+  function meaningMatch(user, meanings) {
+    const u = canonicalMeaning(user);
+    if (!u) return false;
+
+    for (const mm of meanings || []) {
+      if (!mm) continue;
+      if (u === mm) return true;
+      // allow prefix tolerance (equip vs equip with)
+      if (mm.startsWith(u) && (mm.length === u.length || mm[u.length] === " ")) return true;
+      if (u.startsWith(mm) && (u.length === mm.length || u[mm.length] === " ")) return true;
+    }
+    return false;
+  }
+
+  function katakanaToHiragana(s) {
+    return s.replace(/[ァ-ヶ]/g, (ch) => String.fromCharCode(ch.charCodeAt(0) - 0x60));
+  }
+
+  function normalizeReading(s) {
+    s = (s || "").trim();
+    s = katakanaToHiragana(s);
+    s = s.toLowerCase();
+    return s.replace(/[\s　・、。.,!?'\-]/g, "");
+  }
+
+  // expected: reading already normalized by the server's grading bundle.
+  function readingMatch(user, expected) {
+    const u = normalizeReading(user);
+    const e = expected || "";
+    if (!u || !e) return false;
+    if (u === e) return true;
+
+    // IME timing edge: trailing "n" before conversion should match terminal kana n.
+    const variants = new Set([u]);
+    if (u.endsWith("n")) variants.add(u.slice(0, -1) + "ん");
+    if (u.includes("nn")) variants.add(u.split("nn").join("ん"));
+    return variants.has(e);
+  }
+
+  function gradeAnswer(bundle, user) {
+    const correct = bundle.prompt === "reading"
+      ? readingMatch(user, bundle.reading)
+      : meaningMatch(user, bundle.meanings);
+    return { correct, prompt: bundle.prompt, expected: bundle.expected, ideal: bundle.ideal };
+  }
+
+  const api = { normalizeMeaning, canonicalMeaning, meaningMatch, normalizeReading, readingMatch, gradeAnswer };
+  if (typeof module !== "undefined" && module.exports) {
+    module.exports = api;
+  } else {
+    root.WKGrading = api;
+  }
+})(typeof window !== "undefined" ? window : this);
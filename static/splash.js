@@ -1,6 +1,9 @@
 const lessonsCount = document.getElementById("lessonsCount");
 const reviewsCount = document.getElementById("reviewsCount");
 const deckSelect = document.getElementById("deckSelect");
+const reviewLimit = document.getElementById("reviewLimit");
+const reviewOrder = document.getElementById("reviewOrder");
+const reviewsTile = document.querySelector(".wk-tile-reviews");
 const splashDeckName = document.getElementById("splashDeckName");
 const splashMain = document.querySelector(".wk-splash-main");
 const ankiStatus = document.getElementById("ankiStatus");
@@ -75,6 +78,20 @@ deckSelect?.addEventListener("change", async () => {
   await setDeck(chosen);
 });
 
+function updateReviewsLink() {
+  if (!reviewsTile) return;
+  const params = new URLSearchParams();
+  const limit = parseInt(reviewLimit?.value || "", 10);
+  if (limit > 0) params.set("limit", String(limit));
+  const order = reviewOrder?.value || "random";
+  if (order !== "random") params.set("order", order);
+  const qs = params.toString();
+  reviewsTile.href = qs ? `/study/reviews?${qs}` : "/study/reviews";
+}
+
+reviewLimit?.addEventListener("input", updateReviewsLink);
+reviewOrder?.addEventListener("change", updateReviewsLink);
+
 toggleDeckExamples?.addEventListener("click", () => {
   const isHidden = deckExamples.classList.contains("hidden");
   deckExamples.classList.toggle("hidden", !isHidden);
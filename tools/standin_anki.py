@@ -0,0 +1,211 @@
+"""
+Stand-in AnkiConnect for trying the multi-backend setup without Anki.
+
+    python tools/standin_anki.py serve --port 8766 --delay 2
+    python tools/standin_anki.py check
+"""
+import argparse, json, multiprocessing, os, socket, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import DECK_NAME, DEFAULT_BACKEND, serve_backend
+
+
+def standin_card(card_id: int):
+    return {
+        "cardId": card_id,
+        "note": card_id,
+        "deckName": DECK_NAME,
+        "type": 2, "queue": 2, "due": 1000 + card_id,
+        "interval": 1 + card_id % 30, "factor": 2500, "lapses": card_id % 4,
+        "fields": {
+            "Front": {"value": f"語{card_id}", "order": 0},
+            "Back": {"value": f"語[ご{card_id}]", "order": 1},
+            "Notes": {"value": f"word {card_id}, term", "order": 2},
+        },
+    }
+
+def make_standin_anki(port: int, cards: int = 50, delay: float = 0.0):
+    """
+    Minimal AnkiConnect look-alike for trying backends without Anki:
+    one deck of generated cards, answering after `delay` seconds.
+    Answered cards stop being due until undone, like in Anki.
+    """
+    answered = []
+    lock = threading.Lock()
+
+    def answer_cards(answers):
+        with lock:
+            answered.extend(int(a["cardId"]) for a in answers)
+        return [True for _ in answers]
+
+    def undo():
+        with lock:
+            if answered:
+                answered.pop()
+        return True
+
+    def due_ids():
+        with lock:
+            done = set(answered)
+        return [cid for cid in range(1, cards + 1) if cid not in done]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            action, params = body.get("action"), body.get("params") or {}
+            time.sleep(delay)
+            results = {
+                "version": lambda: 6,
+                "deckNames": lambda: [DECK_NAME],
+                "findCards": due_ids,
+                "findNotes": lambda: list(range(1, cards + 1)),
+                "cardsInfo": lambda: [standin_card(int(c)) for c in params.get("cards", [])],
+                "notesInfo": lambda: [
+                    {"noteId": int(n), "cards": [int(n)], "fields": standin_card(int(n))["fields"]}
+                    for n in params.get("notes", [])
+                ],
+                "answerCards": lambda: answer_cards(params.get("answers", [])),
+                "undo": undo,
+            }
+            if action in results:
+                out = {"result": results[action](), "error": None}
+            else:
+                out = {"result": None, "error": "unsupported action"}
+            data = json.dumps(out).encode("utf-8")
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the app gave up waiting (timeout); nothing to tell it
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+def run_serve(args):
+    server = make_standin_anki(args.port, cards=args.cards, delay=args.delay)
+    print(f"Stand-in AnkiConnect on http://127.0.0.1:{args.port} ({args.cards} cards, {args.delay}s delay)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def run_check(args):
+    """
+    Serve a fast, a slow and an unreachable stand-in backend the way
+    app.py's serve_backends() does, and check that they don't hold each other up.
+    """
+    fast_anki = make_standin_anki(free_port())
+    slow_anki = make_standin_anki(free_port(), delay=3.0)
+    for server in (fast_anki, slow_anki):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    backends = [
+        {**DEFAULT_BACKEND, "name": "fast", "url": f"http://127.0.0.1:{fast_anki.server_address[1]}", "port": free_port()},
+        {**DEFAULT_BACKEND, "name": "slow", "url": f"http://127.0.0.1:{slow_anki.server_address[1]}",
+         "port": free_port(), "maxConcurrent": 1, "timeout": 1.0},
+        {**DEFAULT_BACKEND, "name": "down", "url": f"http://127.0.0.1:{free_port()}", "port": free_port()},
+    ]
+    procs = [
+        multiprocessing.Process(target=serve_backend, args=(b, "127.0.0.1", None, False), daemon=True)
+        for b in backends
+    ]
+    for proc in procs:
+        proc.start()
+
+    failures = 0
+    def check(label: str, ok: bool, detail: str):
+        nonlocal failures
+        failures += 0 if ok else 1
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {detail}")
+
+    def timed_get(port: int, path: str):
+        start = time.perf_counter()
+        try:
+            data = requests.get(f"http://127.0.0.1:{port}{path}", timeout=30).json()
+        except Exception as e:
+            data = {"ok": False, "error": str(e)}
+        return time.perf_counter() - start, data
+
+    try:
+        ports = {b["name"]: b["port"] for b in backends}
+        if not all(wait_for_port(port) for port in ports.values()):
+            print("FAIL backend servers did not start")
+            return 1
+
+        # Saturate the slow backend, then use the fast one while it is busy.
+        slow_results = []
+        slow_threads = [
+            threading.Thread(target=lambda: slow_results.append(timed_get(ports["slow"], "/api/backend")))
+            for _ in range(3)
+        ]
+        for t in slow_threads:
+            t.start()
+        time.sleep(0.3)
+        elapsed, data = timed_get(ports["fast"], "/next")
+        check("fast backend serves cards while slow is saturated",
+              elapsed < 1.0 and "card" in data, f"{elapsed:.2f}s")
+        for t in slow_threads:
+            t.join()
+        unhealthy = [d for _, d in slow_results if not d.get("health", {}).get("ok")]
+        check("slow backend reports busy/timeout instead of queueing",
+              len(unhealthy) == len(slow_results),
+              "; ".join(d.get("health", {}).get("error", "?")[:60] for d in unhealthy) or "all healthy")
+
+        timed_get(ports["down"], "/api/backend")
+        elapsed, data = timed_get(ports["down"], "/api/backend")
+        check("unreachable backend fails fast after the first error",
+              elapsed < 0.5 and not data.get("health", {}).get("ok"), f"{elapsed:.2f}s")
+
+        elapsed, data = timed_get(ports["fast"], "/api/backend")
+        check("fast backend still healthy", bool(data.get("health", {}).get("ok")), f"{elapsed:.2f}s")
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for server in (fast_anki, slow_anki):
+            server.shutdown()
+
+    print(f"Checked {len(backends)} stand-in backends, {failures} failures.")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in AnkiConnect for trying backends without Anki.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run a stand-in AnkiConnect server with a generated deck")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--cards", type=int, default=50, help="due cards in the stand-in deck")
+    serve.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every reply")
+    sub.add_parser("check", help="check that fast, slow and unreachable stand-in backends stay isolated")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return run_serve(args)
+    return run_check(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())